@@ -1,25 +1,36 @@
 import argparse
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
+import hashlib
 import os
-import random
+from os.path import splitext
+from queue import Queue
 import re
-import time
+import shutil
+from threading import Lock
+from typing import Optional
+from urllib.parse import quote, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 from rich.progress import (
     BarColumn,
     MofNCompleteColumn,
     Progress,
+    TaskID,
     TextColumn,
     TimeElapsedColumn,
     TimeRemainingColumn,
 )
 from rich.prompt import Prompt
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
 import undetected_chromedriver as uc
+from urllib3.util.retry import Retry
 
 
 @dataclass
@@ -37,64 +48,73 @@ class Chapter:
     pages: list[Page] = field(default_factory=list)
 
 
-def extract_chapter_number(text: str) -> str:
-    regex = re.compile(r"chapter-[0-9]*\.?[0-9]")
+# The comick api could not be used (blocked by cloudflare, unexpected response, ...)
+class ApiError(Exception): ...
+
 
-    m = regex.search(text)
+CHAPTER_NUMBER_REGEX = re.compile(r"chapter-([0-9]*\.?[0-9])")
+PAGE_NUMBER_REGEX = re.compile(r"page ([0-9]+)")
+CHAPTER_IMAGE_REGEX = re.compile(r"/[0-9]*-")
+
+
+def extract_chapter_number(text: str) -> str:
+    m = CHAPTER_NUMBER_REGEX.search(text)
 
     if m:
-        return m.group().split("-")[1]
+        return m.group(1)
 
     return "0"
 
 
 def extract_page_number(text: str) -> str:
-    regex = re.compile(r"page [0-9]*")
-
-    m = regex.search(text)
+    m = PAGE_NUMBER_REGEX.search(text)
 
     if m:
-        return m.group().split()[1]
+        return m.group(1)
 
     return "cover"
 
 
 def extract_file_extension(text: str):
-    ext = text.split("/")[-1].split(".")
-
-    if len(ext) >= 2:
-        return ext[-1]
-    else:
-        return "jpg"
+    return splitext(urlparse(text).path)[1].lstrip(".") or "jpg"
 
 
 def is_cover_image(image_src: str) -> bool:
-    regex = re.compile(r"/[0-9]*-")
+    return CHAPTER_IMAGE_REGEX.search(image_src) is None
 
-    m = regex.search(image_src)
 
-    if m == None:
-        return True
-    else:
-        return False
+PAGE_IMAGE_SELECTOR = "img[src*='.pictures/']"
+CHAPTER_SELECT_SELECTOR = ".info-reader-container select"
+AGE_VERIFICATION_BUTTON_XPATH = (
+    "/html/body/div[2]/div/div/div/div[2]/div[2]/div/div/div/div[3]/div/button"
+)
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+)
+
+IMAGE_PROXY_URL = "https://wsrv.nl/?url="
 
+API_URL = "https://api.comick.app"
+IMAGES_URL = "https://meo.comick.pictures"
+API_CHAPTERS_LIMIT = 300
 
 COVER = None
 COVER_FILE_NAME = None
 
 
 def collect_pages(driver: WebDriver) -> list[Page]:
-    img_elements = driver.find_elements(By.TAG_NAME, "img")
+    # One WebDriver command instead of two per image
+    images: list[list[str]] = driver.execute_script(
+        "return Array.from(document.querySelectorAll(arguments[0]))"
+        ".map(i => [i.src, i.alt])",
+        PAGE_IMAGE_SELECTOR,
+    )
 
     pages = []
 
-    for image in img_elements:
-        image_src = image.get_attribute("src")
-        image_alt = image.get_attribute("alt")
-
-        if not image_src or not ".pictures/" in image_src:
-            continue
-
+    for image_src, image_alt in images:
         if image_alt:
             page_number = extract_page_number(image_alt)
             file_ext = extract_file_extension(image_src)
@@ -113,14 +133,342 @@ def collect_pages(driver: WebDriver) -> list[Page]:
     return pages
 
 
-def expand_range(num: str) -> list[str]:
-    l = []
+def open_browser(url: str) -> WebDriver:
+    options = Options()
+
+    options.add_argument("--headless")
+    options.add_argument("--disable-gpu")
+    # Only the DOM is needed, don't wait for images and stylesheets
+    options.page_load_strategy = "eager"
+    # Pages are read from the <img> src attributes and downloaded with
+    # requests, the browser never needs to load the images itself
+    options.add_experimental_option(
+        "prefs", {"profile.managed_default_content_settings.images": 2}
+    )
+
+    driver = uc.Chrome(options)
+    driver.get(url)
 
+    # Whichever shows up first, the age gate or the reader itself
+    element = WebDriverWait(driver, 10).until(
+        EC.any_of(
+            EC.element_to_be_clickable((By.XPATH, AGE_VERIFICATION_BUTTON_XPATH)),
+            EC.presence_of_element_located((By.CLASS_NAME, "info-reader-container")),
+        )
+    )
+
+    if element.tag_name == "button":
+        print("skipping age verification")
+        element.click()
+
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "info-reader-container"))
+        )
+
+    return driver
+
+
+def copy_browser_cookies(driver: WebDriver, session: requests.Session):
+    # cloudflare only honours cf_clearance with the user agent it was issued to
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+
+    for cookie in driver.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+
+def collect_chapters(driver: WebDriver, manga_url: str) -> list[Chapter]:
+    chapters: list[Chapter] = []
+
+    # The whole chapter list in one WebDriver command
+    options: list[list[str]] = driver.execute_script(
+        "return Array.from(document.querySelector(arguments[0]).options)"
+        ".map(o => [o.value, o.text])",
+        CHAPTER_SELECT_SELECTOR,
+    )
+
+    for chapter_id, text in options[::-1]:
+        chapter_number = ""
+
+        if " " in text:
+            chapter_number = text.split()[1]
+        else:
+            chapter_number = text
+
+        if not chapter_id:
+            continue
+
+        chapters.append(
+            Chapter(
+                chapter_id,
+                chapter_number,
+                f"{manga_url}/{chapter_id}-chapter-{chapter_number}-en",
+            )
+        )
+
+    return chapters
+
+
+def collect_chapter_pages(drivers: Queue[WebDriver], chapter: Chapter):
+    # Borrow a browser from the pool, one chapter per browser at a time
+    driver = drivers.get()
+
+    try:
+        driver.get(chapter.url)
+
+        print(f"Collecting pages for chapter {chapter.number}")
+
+        try:
+            WebDriverWait(driver, 10).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, PAGE_IMAGE_SELECTOR)
+            )
+        except TimeoutException:
+            print(f"No pages found for chapter {chapter.number}")
+            return
+
+        chapter.pages = collect_pages(driver)
+    finally:
+        drivers.put(driver)
+
+
+def create_session(pool_size: int, user_agent: str) -> requests.Session:
+    session = requests.Session()
+    # requests already asks for gzip/deflate (and br when brotli is
+    # installed), only the user agent needs to look like a browser
+    session.headers.update({"User-Agent": user_agent})
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    )
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def api_get(session: requests.Session, path: str, **params) -> dict:
+    try:
+        r = session.get(f"{API_URL}{path}", params=params)
+        r.raise_for_status()
+        data = r.json()
+    except (requests.RequestException, ValueError) as e:
+        raise ApiError(f"{path}: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ApiError(f"{path}: expected a json object")
+
+    return data
+
+
+def api_field(data: dict, key: str, kind: type):
+    value = data.get(key) if isinstance(data, dict) else None
+
+    if not isinstance(value, kind):
+        raise ApiError(f"unexpected api response, '{key}' is not a {kind.__name__}")
+
+    return value
+
+
+def fetch_chapters(
+    session: requests.Session, slug: str, manga_url: str
+) -> list[Chapter]:
+    comic = api_field(api_get(session, f"/comic/{slug}/"), "comic", dict)
+    comic_hid = api_field(comic, "hid", str)
+
+    if comic.get("md_covers"):
+        global COVER
+        global COVER_FILE_NAME
+        b2key = api_field(api_field(comic, "md_covers", list)[0], "b2key", str)
+        COVER = f"{IMAGES_URL}/{b2key}"
+        COVER_FILE_NAME = f"cover.{extract_file_extension(b2key)}"
+
+    chapters: list[Chapter] = []
+    seen: set[str] = set()
+    page = 1
+    fetched = 0
+
+    while True:
+        data = api_get(
+            session,
+            f"/comic/{comic_hid}/chapters",
+            lang="en",
+            page=page,
+            limit=API_CHAPTERS_LIMIT,
+        )
+        rows = api_field(data, "chapters", list)
+        fetched += len(rows)
+
+        for chapter in rows:
+            chapter_id = api_field(chapter, "hid", str)
+            chapter_number = chapter.get("chap")
+
+            if not isinstance(chapter_number, str) or not chapter_number:
+                continue
+
+            # Several groups can upload the same chapter, keep the first one
+            if chapter_number in seen:
+                continue
+
+            seen.add(chapter_number)
+            chapters.append(
+                Chapter(
+                    chapter_id,
+                    chapter_number,
+                    f"{manga_url}/{chapter_id}-chapter-{chapter_number}-en",
+                )
+            )
+
+        total = data.get("total")
+
+        # The api may serve fewer rows than the requested limit, only stop
+        # once it runs dry or everything it announced has been fetched
+        if not rows or (isinstance(total, int) and fetched >= total):
+            break
+
+        page += 1
+
+    # The api lists the newest chapter first
+    return chapters[::-1]
+
+
+def fetch_pages(session: requests.Session, chapter: Chapter) -> list[Page]:
+    data = api_field(api_get(session, f"/chapter/{chapter.id}/"), "chapter", dict)
+    images = api_field(data, "md_images", list)
+
+    # Externally hosted or removed chapters have no images on comick
+    if not images:
+        raise ApiError(f"chapter {chapter.number} has no pages")
+
+    pages = []
+
+    for i, image in enumerate(images, start=1):
+        b2key = api_field(image, "b2key", str)
+        pages.append(
+            Page(str(i), extract_file_extension(b2key), f"{IMAGES_URL}/{b2key}")
+        )
+
+    return pages
+
+
+def proxied_url(url: str) -> str:
+    return f"{IMAGE_PROXY_URL}{quote(url, safe='')}"
+
+
+def expected_file_size(r: requests.Response) -> Optional[int]:
+    # Content-Length is the compressed size when the body is encoded
+    if r.headers.get("Content-Encoding"):
+        return None
+
+    if r.status_code == 206:
+        total = r.headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        total = r.headers.get("Content-Length", "")
+
+    return int(total) if total.isdigit() else None
+
+
+def response_validator(r: requests.Response) -> Optional[str]:
+    # If-Range only accepts strong validators
+    etag = r.headers.get("ETag")
+
+    if etag and not etag.startswith("W/"):
+        return etag
+
+    return r.headers.get("Last-Modified")
+
+
+def remove_part_file(part_path: str):
+    for file in (part_path, f"{part_path}.validator"):
+        if os.path.exists(file):
+            os.remove(file)
+
+
+def download_file(session: requests.Session, url: str, path: str):
+    # Download into a .part file and rename it once complete, so an
+    # interrupted download resumes instead of leaving a truncated image.
+    # The part file is named after its source (with or without --proxy) and
+    # remembers the validator of the response it came from, a resume never
+    # splices two different images together
+    source = hashlib.sha1(url.encode()).hexdigest()[:8]
+    part_path = f"{path}.{source}.part"
+    validator_path = f"{part_path}.validator"
+
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = None
+
+    if os.path.exists(validator_path):
+        with open(validator_path) as f:
+            validator = f.read()
+
+    headers = {}
+
+    # Without a validator there is no telling the part file is still the
+    # same image, download it again from the start
+    if offset and validator:
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+
+    with session.get(url, headers=headers, stream=True) as r:
+        if r.status_code == 416 and headers:
+            total = r.headers.get("Content-Range", "").rpartition("/")[2]
+
+            # Nothing left to fetch, the part file is already complete
+            if total.isdigit() and int(total) == offset:
+                os.replace(part_path, path)
+                remove_part_file(part_path)
+                return
+
+            # The part file is bigger than the image, it is stale or corrupt
+            remove_part_file(part_path)
+
+            return download_file(session, url, path)
+
+        r.raise_for_status()
+        size = expected_file_size(r)
+
+        # The image changed or the server ignored the range, start over
+        if r.status_code != 206:
+            remove_part_file(part_path)
+            validator = response_validator(r)
+
+            if validator:
+                with open(validator_path, "w") as f:
+                    f.write(validator)
+
+        with open(part_path, "ab" if r.status_code == 206 else "wb") as f:
+            # urllib3 won't undo gzip/deflate on the raw stream unless asked to
+            r.raw.decode_content = True
+            shutil.copyfileobj(r.raw, f, length=64 * 1024)
+
+    if size is not None and os.path.getsize(part_path) != size:
+        raise OSError(
+            f"Incomplete download of {url}: "
+            f"got {os.path.getsize(part_path)} of {size} bytes"
+        )
+
+    os.replace(part_path, path)
+    remove_part_file(part_path)
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+
+    return number
+
+
+def expand_range(num: str) -> list[str]:
     start, end = num.split("-")
-    for j in range(int(start), int(end) + 1):
-        l.append(str(j))
 
-    return l
+    return [str(j) for j in range(int(start), int(end) + 1)]
 
 
 def main():
@@ -146,130 +494,246 @@ def main():
         help="Chapters to download, can be '1,2,3,4,5'/'1,2,3,4,5-10'/'1-10','*'. A '*' to downloads all",
     )
 
-    args = parser.parse_args()
-
-    url: str = args.url or Prompt.ask("Enter [bold green]url[/bold green]")
-
-    output_directory: str = args.output or url.split("/")[-2]
-    chapters_str: str = args.chapters
-    chapters_to_download: list[str] = []
-
-    if "," in chapters_str:
-        num = chapters_str.split(",")
-
-        for i in num:
-            if "-" in i:
-                for j in expand_range(i):
-                    chapters_to_download.append(j)
-            else:
-                chapters_to_download.append(i)
-    else:
-        if "-" in chapters_str:
-            for j in expand_range(chapters_str):
-                chapters_to_download.append(j)
-        else:
-            chapters_to_download.append(chapters_str)
-
-    options = Options()
-
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        required=False,
+        default=16,
+        help="Number of pages to download at the same time (Default: 16)",
+    )
 
-    print(f"Opening web browser, please wait!")
-    driver = uc.Chrome(options)
-    driver.get(url)
+    parser.add_argument(
+        "--browsers",
+        type=positive_int,
+        required=False,
+        default=1,
+        help="Number of browsers used to collect chapter pages in parallel (Default: 1)",
+    )
 
-    try:
-        view_page_button = driver.find_element(
-            By.XPATH,
-            "/html/body/div[2]/div/div/div/div[2]/div[2]/div/div/div/div[3]/div/button",
-        )
+    parser.add_argument(
+        "--proxy",
+        action="store_true",
+        help="Download images through the wsrv.nl image cache instead of the comick servers",
+    )
 
-        print("skipping age verification")
-        view_page_button.click()
-    except NoSuchElementException:
-        # No view page button found!
-        ...
+    parser.add_argument(
+        "--cf-clearance",
+        type=str,
+        required=False,
+        help="Value of the 'cf_clearance' cookie, used when talking to the comick api",
+    )
 
-    print("Collecting chapters")
-    info_container = driver.find_elements(By.CLASS_NAME, "info-reader-container")[0]
+    parser.add_argument(
+        "--user-agent",
+        type=str,
+        required=False,
+        default=USER_AGENT,
+        help="User agent of the browser the 'cf_clearance' cookie was taken from, cloudflare rejects the cookie with any other (Default: a desktop Chrome user agent)",
+    )
 
-    selectors = info_container.find_elements(By.TAG_NAME, "select")[0]
-    manga_url = "/".join(list(url.split("/")[0:-1]))
-    chapters: list[Chapter] = []
+    args = parser.parse_args()
 
-    # Collecting chapters
-    for option in selectors.find_elements(By.TAG_NAME, "option")[::-1]:
-        chapter_id = option.get_attribute("value")
+    url: str = args.url or Prompt.ask("Enter [bold green]url[/bold green]")
 
-        text = option.text
-        chapter_number = ""
+    output_directory: str = args.output or url.split("/")[-2]
+    chapters_str: str = args.chapters
+    chapters_to_download: set[str] = set()
 
-        if " " in text:
-            chapter_number = text.split()[1]
+    for i in chapters_str.split(","):
+        if "-" in i:
+            chapters_to_download.update(expand_range(i))
         else:
-            chapter_number = text
+            chapters_to_download.add(i)
 
-        if not chapter_id:
-            continue
-
-        ch = Chapter(
-            chapter_id,
-            chapter_number,
-            f"{manga_url}/{chapter_id}-chapter-{chapter_number}-en",
-        )
+    download_all = "*" in chapters_to_download
 
-        if "*" in chapters_to_download or ch.number in chapters_to_download:
-            chapters.append(ch)
+    session = create_session(args.workers, args.user_agent)
 
-    print("Collecting pages")
-    # Collecting pages
-    for chapter in chapters:
-        driver.get(chapter.url)
+    if args.cf_clearance:
+        session.cookies.set("cf_clearance", args.cf_clearance, domain=".comick.app")
 
-        print(f"Collecting pages for chapter {chapter.number}")
-        chapter.pages = collect_pages(driver)
+    slug = url.split("/")[-2]
+    manga_url = "/".join(list(url.split("/")[0:-1]))
+    driver: Optional[WebDriver] = None
+    use_api = True
 
-        time.sleep(random.uniform(0.100, 0.900))
-
-    if not os.path.exists(f"{output_directory}/chapters"):
-        os.makedirs(f"{output_directory}/chapters")
-
-    if not os.path.exists(f"{output_directory}/{COVER_FILE_NAME}"):
-        if COVER:
-            with open(
-                f"{output_directory}/{COVER_FILE_NAME}",
-                "wb",
-            ) as f:
-                f.write(requests.get(COVER).content)
-
-    # Download chapters
-    for chapter in chapters:
-        if not os.path.exists(f"{output_directory}/chapters/{chapter.number}"):
-            os.mkdir(f"{output_directory}/chapters/{chapter.number}")
-
-        progress_bar = Progress(
-            TextColumn(f"Chapter {chapter.number}"),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            BarColumn(),
-            MofNCompleteColumn(),
-            TextColumn("•"),
-            TimeElapsedColumn(),
-            TextColumn("•"),
-            TimeRemainingColumn(),
-        )
+    print("Collecting chapters")
+    try:
+        all_chapters = fetch_chapters(session, slug, manga_url)
+    except ApiError:
+        print("Could not use the api, opening web browser, please wait!")
+        driver = open_browser(url)
+
+        # The browser got past cloudflare, give the api its cf_clearance
+        copy_browser_cookies(driver, session)
+
+        try:
+            all_chapters = fetch_chapters(session, slug, manga_url)
+        except ApiError:
+            print("Still could not use the api, falling back to the web browser")
+            use_api = False
+            all_chapters = collect_chapters(driver, manga_url)
+
+    chapters: list[Chapter] = [
+        ch for ch in all_chapters if download_all or ch.number in chapters_to_download
+    ]
+
+    os.makedirs(f"{output_directory}/chapters", exist_ok=True)
+
+    progress_bar = Progress(
+        TextColumn("{task.description}"),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TextColumn("•"),
+        TimeElapsedColumn(),
+        TextColumn("•"),
+        TimeRemainingColumn(),
+    )
 
-        with progress_bar as p:
-            for page in p.track(
-                chapter.pages, description=f"Downloading chapter {chapter.number}"
-            ):
-                with open(
-                    f"{output_directory}/chapters/{chapter.number}/{page.number}.{page.file_extension}",
-                    "wb",
-                ) as f:
-                    f.write(requests.get(page.image_url).content)
-
-    driver.close()
+    # Chapters are downloaded as soon as their pages are known, while the
+    # next chapters are still being collected
+    download_pool = ThreadPoolExecutor(max_workers=args.workers)
+    # (path, error) of every download that failed
+    failed: list[tuple[str, BaseException]] = []
+
+    with progress_bar as p:
+        overall_task = p.add_task("All chapters", total=0)
+        queued_pages = 0
+
+        # Pages left per chapter, finished chapters are hidden so a long
+        # series doesn't push the ones in progress off the screen
+        pages_left: dict[TaskID, int] = {}
+        pages_left_lock = Lock()
+
+        def page_done(task: TaskID):
+            p.advance(task)
+            p.advance(overall_task)
+
+            with pages_left_lock:
+                pages_left[task] -= 1
+                finished = pages_left[task] == 0
+
+            if finished:
+                p.update(task, visible=False)
+
+        def submit_download(url: str, path: str, task: Optional[TaskID] = None):
+            def done(future: Future):
+                if future.cancelled():
+                    return
+
+                if future.exception():
+                    failed.append((path, future.exception()))
+                elif task is not None:
+                    page_done(task)
+
+            download_pool.submit(
+                download_file,
+                session,
+                proxied_url(url) if args.proxy else url,
+                path,
+            ).add_done_callback(done)
+
+        def download_chapter(chapter: Chapter):
+            nonlocal queued_pages
+
+            os.makedirs(f"{output_directory}/chapters/{chapter.number}", exist_ok=True)
+
+            task = p.add_task(f"Chapter {chapter.number}", total=len(chapter.pages))
+            pages_left[task] = len(chapter.pages)
+            queued_pages += len(chapter.pages)
+            p.update(overall_task, total=queued_pages)
+
+            if not chapter.pages:
+                p.update(task, visible=False)
+
+            for page in chapter.pages:
+                path = f"{output_directory}/chapters/{chapter.number}/{page.number}.{page.file_extension}"
+
+                # Already downloaded by a previous run
+                if os.path.exists(path) and os.path.getsize(path) > 0:
+                    page_done(task)
+                    continue
+
+                submit_download(page.image_url, path, task)
+
+        try:
+            print("Collecting pages")
+            # Chapters the api could not give us pages for
+            missing: list[Chapter] = []
+
+            for chapter in chapters:
+                # Every page request would fail the same way the chapter one did
+                if not use_api:
+                    missing.append(chapter)
+                    continue
+
+                try:
+                    chapter.pages = fetch_pages(session, chapter)
+                except ApiError:
+                    # Reported by collect_chapter_pages once a browser picks it up
+                    missing.append(chapter)
+                    continue
+
+                print(f"Collected pages for chapter {chapter.number}")
+                download_chapter(chapter)
+
+            if missing:
+                drivers: Queue[WebDriver] = Queue()
+
+                if driver:
+                    drivers.put(driver)
+
+                try:
+                    # Browsers are opened one by one, undetected_chromedriver
+                    # patches the driver binary on startup and does not like
+                    # doing it concurrently
+                    for _ in range(drivers.qsize(), min(args.browsers, len(missing))):
+                        print(f"Opening web browser, please wait!")
+                        drivers.put(open_browser(url))
+
+                    executor = ThreadPoolExecutor(max_workers=drivers.qsize())
+
+                    try:
+                        collecting = {
+                            executor.submit(collect_chapter_pages, drivers, ch): ch
+                            for ch in missing
+                        }
+
+                        for future in as_completed(collecting):
+                            future.result()
+                            download_chapter(collecting[future])
+                    except BaseException:
+                        # Don't load every remaining chapter before giving up
+                        executor.shutdown(cancel_futures=True)
+                        raise
+
+                    executor.shutdown()
+                finally:
+                    while not drivers.empty():
+                        drivers.get().close()
+            elif driver:
+                driver.close()
+
+            if not os.path.exists(f"{output_directory}/{COVER_FILE_NAME}"):
+                if COVER:
+                    submit_download(COVER, f"{output_directory}/{COVER_FILE_NAME}")
+
+            # Most of the run is spent waiting here, keep it inside the try
+            # so ^C cancels the queued pages too
+            download_pool.shutdown()
+        except BaseException:
+            # Don't make ^C (or a crash) sit through every queued page
+            download_pool.shutdown(cancel_futures=True)
+            raise
+
+    if failed:
+        print(f"Failed to download {len(failed)} file(s):")
+
+        for path, error in failed:
+            print(f"  {path}: {error}")
+
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":